@@ -1,9 +1,8 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import streamlit as st
-from PIL import Image
-import math
 
 # SECTION 0: BASIC STREAMLIT APPEARANCE
 
@@ -15,225 +14,309 @@ st.title('Book Recommender')
 
 # SECTION 1: LOADING DATA
 
-# load/read the two datasets
-goodreads = pd.read_csv('goodreads_books.csv')
-categories = pd.read_csv('categories_books.csv')
-
-
-# SECTION 2: DATA CLEANING 
-
-# renaming the isbn column in "goodreads" to isbn 10 so that its consistent with what's in "categories"
-goodreads.rename(columns = {'isbn':'isbn10'}, inplace = True)
-
-# seeing if there are any missing values in the unique ID (isbn10) column
-# both isbn 10 and 13 could be used to merge the datasets, both are accepted versions of isbn
-# however, isbn 13 is a newer system than isbn 10 - still I will merge on isbn10 because its less digits
-null_g = goodreads['isbn10'].isnull().sum()
-null_c = categories['isbn10'].isnull().sum()
-# null_g, null_c
-
-# altogether I am eliminating isbn13 because the datasets have different datatypes for this col
-# and we already have isbn10 so having both isn't necessary
-del categories['isbn13']
-del goodreads['isbn13']
-
-# before we merge I'm eliminating the authors, title, average_rating, num_pages, published_year, and ratings_count 
-# columns from "categories" because that information is repeated in "goodreads"
-# kaggle community upvoted "goodreads" more so I'm going to accept its values over the categories values
-# also, both datasets are equally as old, so one isn't preferred over the other for that reason
-del categories['authors']
-del categories['title']
-del categories['average_rating']
-del categories['num_pages']
-del categories['published_year']
-del categories['ratings_count']
-
-# this ID is only unique to one dataset so it won't be of use
-del goodreads['bookID']
-
-# merging the two datasets on isbn10
-# according to Kaggle documentation, "categories" got its isbns from "goodreads" so the values should be consistent
-all_books = pd.merge(goodreads, categories, how="inner", on=["isbn10"])
-
-# correcting datatypes for columns in merged data
-all_books['average_rating'] = all_books['average_rating'].astype(float)
-all_books['ratings_count'] = all_books['ratings_count'].astype(int)
-all_books['num_pages'] = all_books['  num_pages'].astype(int)
-all_books['categories'] = all_books['categories'].astype(str)
-
-# SECTION 3: GROUPING SIMILAR GENRES
-
-# A lot of the genres are similar, but just spelled/capitalized differently
-# So lets map some similar values onto the original data
-similar_genre = {'BIOGRAPHY & AUTOBIOGRAPHY': 'Biography & Autobiography', \
-                'Political science': 'Political Science', \
-                'Political leadership': 'Political Science',\
-                'Political fiction': 'Political Science', \
-                'Literary Criticism & Collections': 'Literary Criticism', \
-                'LITERARY CRITICISM' : 'Literary Criticism', \
-                'JUVENILE FICTION' : 'Juvenile Fiction', \
-                'Humorous stories, American': 'Humor', \
-                'Humorous stories' : 'Humor', \
-                'Humorous stories, English': 'Humor', \
-                'Humorous fiction': 'Humor', \
-                'Comedy' : 'Humor', \
-                'Detective and mystery stories, American': 'Detective and mystery stories', \
-                'Detective and mystery stories, English' : 'Detective and mystery stories'
-                }
-# I could spend a lot of time grouping the genres, but that would take a while so I only did a few
-# Automating this process would be lengthy and complicated - like do you sort "humorous fiction" with "fiction" or "humor"?
-
-# actually replacing mapped valude in the allbooks genre column
-all_books['categories'] = all_books['categories'].replace(similar_genre)
-
-
-# SECTION 4: ELIMINATING INFREQUENT GENRES
-
-# initializing the dictionary
-frequency = {}
-
-# creating a categories list based on just the categories genre in all_books
-cate_list = all_books['categories']
-
-# this fills a dictionary with all the genres (key) and how many times they appear (value)
-# iterating over the list
-for item in cate_list:
-   # checking the element in dictionary
-   if item in frequency:
-      # incrementing the count
-      frequency[item] += 1
-   else:
-      # initializing the count
-      frequency[item] = 1
-
-# makes a new frequency column that shows the frequency of each genre of each book
-all_books['genre_frequency']= all_books['categories'].map(frequency)
-
-# lets eliminate genres with less than or equal to 5 books so the reader can have a digestible list of genres
-# otherwise there are a TON of genres the user would have to sift through (many of which are repeats of similar genres)
-all_books = all_books[all_books['genre_frequency'] >= 5]
-
-# lets also eliminate all books with no genre
-all_books = all_books[all_books['categories'] != 'nan']
-# great, now we have a list of books from relatively "popular" genres
-
-# makes a list of all genres (or categories) in dataset
-genre_list = []
-for category in all_books['categories']:
-    if category not in genre_list:
-        genre_list.append(category)
-
-# alphebetizes the genre list
-genre_list = sorted(genre_list)
-# we'll use this list later when displaying all the genres for the reader to select
-
-
-# SECTION 5: BAYESIAN AVERAGE FOR REVIEWS
-
-# so I want to create a "average" rating that weighs both the average rating on goodreads and the # of reviews
-# this is so that books with 1 5-star rating don't get ranked higher in my recommender than books with 100 4-star ratings
-
-# I used the bayesian average weighting method for weighing both average review with number of reviews
-# the formula was taken from the following source
-# https://www.algolia.com/doc/guides/solutions/ecommerce/relevance-optimization/tutorials/bayesian-average/
-
-# c is a confidence measure, the document used 100 for simplicity
-# I followed their suggested approach  to make c the 25th percentile rating count (which is about 184)
-C = all_books['ratings_count'].quantile(q=0.25)
-
-# m is the arithmetic average rating of all products
-m = all_books['average_rating'].mean()
-
-# bayes average for a book = [(average rating * ratings count) + (C*m)]/ [ratings count + C]
-# defining a new column with this average
-all_books['bayes_average'] = (all_books['average_rating'] * all_books['ratings_count'] + C*m) / (all_books['ratings_count'] + C)
-# this average is ONLY used internally to determine the rank of the books displayed to the reader
-# this is NOT the star rating displayed to the user
+# everything from loading the csvs down to the bayesian average lives in this function
+def read_books():
+    # load/read the two datasets
+    # the pyarrow engine parses the csvs on multiple threads, and usecols means the columns
+    # we never use are skipped entirely instead of being loaded and then deleted
+    # isbn13 is left out because the datasets have different datatypes for this col
+    # and we already have isbn10 so having both isn't necessary
+    # bookID is left out because this ID is only unique to one dataset so it won't be of use
+    # authors, title, average_rating, num_pages, published_year, and ratings_count are left out of "categories"
+    # because that information is repeated in "goodreads"
+    # kaggle community upvoted "goodreads" more so I'm going to accept its values over the categories values
+    # also, both datasets are equally as old, so one isn't preferred over the other for that reason
+    # the text columns are kept as arrow-backed strings, which stores them in one contiguous block
+    # instead of as thousands of separate python string objects
+    goodreads = pd.read_csv('goodreads_books.csv', engine='pyarrow',
+                            usecols=['title', 'authors', 'average_rating', 'isbn', '  num_pages', 'ratings_count'],
+                            dtype={'title': 'string[pyarrow]', 'authors': 'string[pyarrow]',
+                                   'isbn': 'string[pyarrow]', 'ratings_count': 'int32'})
+    categories = pd.read_csv('categories_books.csv', engine='pyarrow',
+                             usecols=['isbn10', 'categories', 'thumbnail', 'description'],
+                             dtype={'isbn10': 'string[pyarrow]', 'thumbnail': 'string[pyarrow]',
+                                    'description': 'string[pyarrow]'})
+    # the pyarrow engine hands back a missing genre as None instead of NaN
+    # books with no genre are filtered out by looking for 'nan' in section 4, so keep them as NaN
+    categories['categories'] = categories['categories'].fillna(np.nan)
+
+
+    # SECTION 2: DATA CLEANING 
+
+    # renaming the isbn column in "goodreads" to isbn 10 so that its consistent with what's in "categories"
+    # the page count column also has stray spaces in its name in the original csv
+    goodreads.rename(columns = {'isbn':'isbn10', '  num_pages':'num_pages'}, inplace = True)
+
+    # seeing if there are any missing values in the unique ID (isbn10) column
+    # both isbn 10 and 13 could be used to merge the datasets, both are accepted versions of isbn
+    # however, isbn 13 is a newer system than isbn 10 - still I will merge on isbn10 because its less digits
+    null_g = goodreads['isbn10'].isnull().sum()
+    null_c = categories['isbn10'].isnull().sum()
+    # null_g, null_c
+
+    # merging the two datasets on isbn10
+    # according to Kaggle documentation, "categories" got its isbns from "goodreads" so the values should be consistent
+    # both datasets are indexed by isbn10 first so the join can line them up on their indexes
+    goodreads = goodreads.set_index('isbn10')
+    categories = categories.set_index('isbn10')
+    all_books = goodreads.join(categories, how='inner').reset_index()
+
+    # correcting datatypes for columns in merged data
+    # a few rows in "goodreads" have an extra comma that shifts their columns, so average_rating and num_pages
+    # can't be typed while parsing - those rows don't survive the merge, so the cast is safe here
+    all_books['average_rating'] = all_books['average_rating'].astype(float)
+    all_books['num_pages'] = all_books['num_pages'].astype('int32')
+    # there are only a few hundred distinct genres across thousands of books, so storing the column as a pandas
+    # categorical keeps each genre name once and lets grouping/counting/comparing genres work on small integer codes
+    all_books['categories'] = all_books['categories'].astype(str).astype('category')
+
+    # SECTION 3: GROUPING SIMILAR GENRES
+
+    # A lot of the genres are similar, but just spelled/capitalized differently
+    # So lets map some similar values onto the original data
+    similar_genre = {'BIOGRAPHY & AUTOBIOGRAPHY': 'Biography & Autobiography', \
+                    'Political science': 'Political Science', \
+                    'Political leadership': 'Political Science',\
+                    'Political fiction': 'Political Science', \
+                    'Literary Criticism & Collections': 'Literary Criticism', \
+                    'LITERARY CRITICISM' : 'Literary Criticism', \
+                    'JUVENILE FICTION' : 'Juvenile Fiction', \
+                    'Humorous stories, American': 'Humor', \
+                    'Humorous stories' : 'Humor', \
+                    'Humorous stories, English': 'Humor', \
+                    'Humorous fiction': 'Humor', \
+                    'Comedy' : 'Humor', \
+                    'Detective and mystery stories, American': 'Detective and mystery stories', \
+                    'Detective and mystery stories, English' : 'Detective and mystery stories'
+                    }
+    # I could spend a lot of time grouping the genres, but that would take a while so I only did a few
+    # Automating this process would be lengthy and complicated - like do you sort "humorous fiction" with "fiction" or "humor"?
+
+    # actually replacing mapped valude in the allbooks genre column
+    # the mapping only has to be applied to each distinct genre name, not to every book
+    # rename_categories can't merge two genres into one, so the books' codes are pointed at the merged names instead
+    genre_names = all_books['categories'].cat.categories
+    mapped_names = pd.Index([similar_genre.get(genre, genre) for genre in genre_names])
+    merged_names = mapped_names.unique()
+    merged_codes = merged_names.get_indexer(mapped_names)[all_books['categories'].cat.codes]
+    all_books['categories'] = pd.Categorical.from_codes(merged_codes, merged_names)
+
+
+    # SECTION 4: ELIMINATING INFREQUENT GENRES
+
+    # how many times each genre appears, looked up for every book through its genre's code
+    # (mapping the categorical directly would hand back another categorical when the counts are all different,
+    # and that can't be compared with >=)
+    genre_codes = all_books['categories'].cat.codes.to_numpy()
+    genre_frequency = np.bincount(genre_codes, minlength=len(all_books['categories'].cat.categories))[genre_codes]
+
+    # lets eliminate genres with less than or equal to 5 books so the reader can have a digestible list of genres
+    # otherwise there are a TON of genres the user would have to sift through (many of which are repeats of similar genres)
+    # lets also eliminate all books with no genre
+    # all the conditions go into one mask so the data only gets filtered once
+    # a book with no genre is either missing entirely or was turned into the text 'nan' in section 2
+    mask = (genre_frequency >= 5) & all_books['categories'].notna() & (all_books['categories'] != 'nan')
+    # copy so the columns added below go onto the filtered books rather than a view of the unfiltered ones
+    all_books = all_books.loc[mask].copy()
+
+    # drop the genres that no longer have any books from the categorical
+    all_books['categories'] = all_books['categories'].cat.remove_unused_categories()
+    # great, now we have a list of books from relatively "popular" genres
+
+    # makes an alphebetized list of all genres (or categories) in dataset
+    genre_list = sorted(all_books['categories'].unique())
+    # we'll use this list later when displaying all the genres for the reader to select
+
+
+    # SECTION 5: BAYESIAN AVERAGE FOR REVIEWS
+
+    # so I want to create a "average" rating that weighs both the average rating on goodreads and the # of reviews
+    # this is so that books with 1 5-star rating don't get ranked higher in my recommender than books with 100 4-star ratings
+
+    # I used the bayesian average weighting method for weighing both average review with number of reviews
+    # the formula was taken from the following source
+    # https://www.algolia.com/doc/guides/solutions/ecommerce/relevance-optimization/tutorials/bayesian-average/
+
+    # c is a confidence measure, the document used 100 for simplicity
+    # I followed their suggested approach  to make c the 25th percentile rating count (which is about 184)
+    # we only need the one value, so np.partition just moves the two rating counts on either side of the
+    # 25% mark into place instead of ordering all of them, then we interpolate between them like quantile() does
+    counts = all_books['ratings_count'].to_numpy()
+    position = 0.25 * (counts.size - 1)
+    lower = int(position)
+    upper = min(lower + 1, counts.size - 1)
+    partitioned = np.partition(counts, (lower, upper))
+    C = float(partitioned[lower] + (partitioned[upper] - partitioned[lower]) * (position - lower))
+
+    # m is the arithmetic average rating of all products
+    m = all_books['average_rating'].mean()
+
+    # bayes average for a book = [(average rating * ratings count) + (C*m)]/ [ratings count + C]
+    # defining a new column with this average
+    # ratings only go to 2 decimal places, so float32 is plenty precise and halves the memory the math has to read
+    ar = all_books['average_rating'].to_numpy(np.float32)
+    rc = all_books['ratings_count'].to_numpy(np.float32)
+    C32 = np.float32(C)
+    m32 = np.float32(m)
+    all_books['bayes_average'] = (ar * rc + C32 * m32) / (rc + C32)
+    # this average is ONLY used internally to determine the rank of the books displayed to the reader
+    # this is NOT the star rating displayed to the user
+
+    # we use this later for the star display - it rounds ratings to the nearest full star
+    # it reuses the float32 ratings from above so the ratings column is only read once
+    all_books['rounded_rating'] = np.round(ar)
+
+    # lowercased copy of the authors column for the author search in section 7
+    # doing this once here means the search doesn't have to lowercase every author on every keystroke
+    # books with no author get an empty string so the search can treat every value as text
+    all_books['authors_lowercase'] = all_books['authors'].str.lower().fillna('')
+
+    # marks which books are missing each piece of info we display in section 6
+    # (missing_thumbnail, missing_description, etc.) so displaying a book is just a true/false check
+    for column in ('thumbnail', 'description', 'categories', 'num_pages', 'isbn10'):
+        all_books['missing_' + column] = all_books[column].isna()
+
+    # puts every book into one of the page ranges the user can pick from in section 7
+    # (<300, 300-499, and 500+) so narrowing by book length doesn't have to compare page counts each time
+    all_books['page_bucket'] = pd.cut(all_books['num_pages'], bins=[-np.inf, 299, 499, np.inf], labels=['<300', '300-499', '500+'])
+
+    # ranks all the books by our bayes average once, so books with higher bayes average are higher up
+    # narrowing by genre/author/pages keeps this order, so the top recommendations are just the first rows
+    all_books = all_books.sort_values('bayes_average', ascending=False).reset_index(drop=True)
+
+    # the row positions of the books in each genre, so picking a genre in section 7
+    # is a dictionary lookup instead of checking every book's genre
+    genre_to_idx = all_books.groupby('categories', observed=True).indices
+
+    return all_books, genre_list, genre_to_idx
+
+# reading the books happens in a background thread so the csvs are parsed while the page and sidebar are drawn
+# cache_resource makes sure the thread is only started once, not on every rerun
+# set BOOK_RECOMMENDER_BACKGROUND_LOAD=0 to read the books in the main thread instead (easier to debug)
+background_load = os.environ.get('BOOK_RECOMMENDER_BACKGROUND_LOAD', '1') != '0'
+
+@st.cache_resource
+def start_loading_books():
+    executor = ThreadPoolExecutor(max_workers=1)
+    loading = executor.submit(read_books)
+    # lets the thread exit once the books are read
+    executor.shutdown(wait=False)
+    return loading
+
+# streamlit reruns the whole script on every widget interaction, so caching means the csvs
+# are only read and cleaned once instead of on every click/keystroke
+@st.cache_data(ttl=None)
+def load_books():
+    if not background_load:
+        return read_books()
+    loading = start_loading_books()
+    try:
+        return loading.result()
+    except Exception:
+        # forget the failed load so the next rerun tries again
+        start_loading_books.clear()
+        raise
+
+# kicks off reading the books now, we only wait for them in section 7 when they're needed
+if background_load:
+    start_loading_books()
+
+# the most book recommendations a user can ask for at once
+max_recommendations = 1000
+
+# the top ranked books in one genre and page range
+# cached per genre/page range, so going back to a genre the app has already shown is just a lookup
+# the books are already ranked by bayes average, so only the first max_recommendations could ever be shown
+@st.cache_data(ttl=None)
+def top_books_in_genre(genre, pages):
+    all_books, _, genre_to_idx = load_books()
+    narrowed_genre = all_books.iloc[genre_to_idx.get(genre, np.array([], dtype=np.int64))]
+    return narrowed_genre[narrowed_genre['page_bucket'] == pages].head(max_recommendations).reset_index(drop=True)
 
 
 # SECTION 6: GENERAL FUNCTION FOR NARROWING & DISPLAYING DATA
 # this function is called in section 7
 
-# we use this later for the star display - it rounds ratings to the nearest full star
-all_books['rounded_rating'] = all_books['average_rating'].round()
+# the star display for every possible rounded rating (0 to 5 stars), built once instead of for every book shown
+star_strings = tuple("⭐" * stars for stars in range(6))
 
-# creates a function that narrows down data based on page # & displays book info
-# it accepts a dataset either narrowed by genre or author, and the author/genre the user selected
-def narrowed_general(narrowed_set, user_input):
+# the columns we show for each recommended book, plus whether each one is missing
+displayed_columns = ('thumbnail', 'rounded_rating', 'title', 'authors', 'description', 'categories', 'num_pages', 'isbn10',
+                     'missing_thumbnail', 'missing_description', 'missing_categories', 'missing_num_pages', 'missing_isbn10')
 
-    # NARROWING
+# function that displays an image to user
+# accepts "books" (the displayed columns as plain lists), "ind" (the position of the book in question)
+# and "column" (the name of a column, in our case the thumbnail column)
+def display_image_to_user(books, ind, column):
+    # if theres no image available, do nothing
+    if books['missing_' + column][ind]:
+        pass
+    # if there is an image available, display the image
+    else:
+        st.image(books[column][ind])
 
-    # narrows data based on "pages" or the book length the user is willing to read
-    if pages == '<300':
-        narrowed_pages = narrowed_set[narrowed_set['num_pages'] < 300]
-    elif pages == '300-499':
-        narrowed_pages = narrowed_set[(300 <= narrowed_set['num_pages'])  & (narrowed_set['num_pages'] <= 499)]
-    elif pages == '500+':
-        narrowed_pages = narrowed_set[500 <= narrowed_set['num_pages']]
+# function that displays text to the user
+# accepts "books" and "ind" like above, "bolded" (label you want for the text displayed) and "column" (the name of a column)
+def display_text_to_user(books, ind, bolded, column):
+    # if theres no value available, do nothing
+    if books['missing_' + column][ind]:
+        pass
+    # if there is, display the text
+    else:
+        st.write("**" + bolded + ":**",str(books[column][ind]))
 
-    # this ranks the dataset based on our bayes average from earlier - so books with higher bayes average are higher up
-    # it also narrows dataset based on how many recommendations the user wants
-    displayed_df = narrowed_pages.sort_values(['bayes_average'], ascending=[False]).head(number_rec)
+# creates a function that narrows down data based on how many recommendations the user wants & displays book info
+# it accepts a dataset already narrowed by page # and either genre or author, and the author/genre the user selected
+def narrowed_general(narrowed_pages, user_input):
 
-    # DISPLAYING
+    # NARROWING
+
+    # the dataset is already ranked by our bayes average from earlier (see load_books)
+    # so this just narrows dataset based on how many recommendations the user wants
+    displayed_df = narrowed_pages.head(number_rec)
 
-    # function that displays an image to user
-    # accepts "column" (the name of a column, in our case the thumbnail column)
-    # it uses the index of the book in question to identify the image/thumbnail of that book
-    def display_image_to_user(column):
-        # if theres no image available, do nothing
-        if str(displayed_df[column][ind]) == 'nan':
-            pass
-        # if there is an image available, display the image
-        else:
-            st.image(displayed_df[column][ind])
-
-    # function that displays text to the user
-    # accepts "bolded" (label you want for the text displayed) and "column" (the name of a column)
-    def display_text_to_user(bolded, column):
-        # if theres no value available, do nothing
-        if str(displayed_df[column][ind]) == 'nan':
-            pass
-        # if there is, display the text
-        else:
-            st.write("**" + bolded + ":**",str(displayed_df[column][ind]))
-
-    # initializing a counter to show what # recommendation is shown (like if its recommendation #2 or #5)
-    count = 0
+    # DISPLAYING
 
     # if the user hasn't selected an author or genre yet, display nothing
     if user_input == "":
         pass
     # otherwise go ahead and show all the book info
+    # each displayed column is pulled out as a plain list once, so showing a book is just list lookups
+    # count keeps track of what # recommendation is shown (like if its recommendation #2 or #5)
     else: 
-        for ind in displayed_df.index:
-            count = count + 1
+        books = {column: displayed_df[column].tolist() for column in displayed_columns}
+        for ind in range(len(displayed_df)):
+            count = ind + 1
             # shows what number recommendation it is
             st.subheader("Book #" + str(count))
             # shows the book cover
-            display_image_to_user('thumbnail')
+            display_image_to_user(books, ind, 'thumbnail')
             # shows the rating of the book (in visualized stars!)
-            st.markdown("⭐" * int(displayed_df['rounded_rating'][ind]))
+            st.markdown(star_strings[int(books['rounded_rating'][ind])])
             # shows the name of the book and the author
-            st.write("**Recommendation:** ", displayed_df['title'][ind], 'by ', displayed_df['authors'][ind])
+            st.write("**Recommendation:** ", books['title'][ind], 'by ', books['authors'][ind])
             # shows the description of the book, but the user has to expand the description to see it (some are very long!)
             with st.expander("See Description"):
-                if str(displayed_df['description'][ind]) == 'nan':
+                if books['missing_description'][ind]:
                     pass
                 else:
-                    st.write(str(displayed_df['description'][ind]))
+                    st.write(str(books['description'][ind]))
             # shows the genre of the book
-            display_text_to_user('Genre', 'categories')
+            display_text_to_user(books, ind, 'Genre', 'categories')
             # shows how many pages the book is
-            display_text_to_user('Page count', 'num_pages')
+            display_text_to_user(books, ind, 'Page count', 'num_pages')
             # shows the ISBN of the book
-            display_text_to_user('ISBN 10', 'isbn10')
+            display_text_to_user(books, ind, 'ISBN 10', 'isbn10')
 
 # SECTION 7: SPECIFIC FUNCTION FOR NARROWING & DISPLAYING DATA BY AUTHOR/GENRE
 
 # asks the user to select whether they want recommendations by author or genre
 author_or_genre = st.sidebar.selectbox('Do you want to get book recommendations by author or genre?', (' ', 'Author', 'Genre'))
 
+# load (or fetch from the cache) the cleaned books data and the list of genres
+# (the books in each genre are only needed by top_books_in_genre)
+all_books, genre_list, _ = load_books()
+
 # if the user selects that they want recommendations by author, do the following
 if author_or_genre == 'Author':
     # accepts user input for an author 
@@ -250,10 +333,17 @@ if author_or_genre == 'Author':
     pages = st.sidebar.selectbox('Page number', ('<300', '300-499', '500+'))
 
     # accepts user input for how many books the reader wants suggested
-    number_rec = st.sidebar.number_input('Number of book recommendations', min_value = 0, max_value = 1000)
+    number_rec = st.sidebar.number_input('Number of book recommendations', min_value = 0, max_value = max_recommendations)
 
     # narrowing the dataframe based on what author the user wants
-    narrowed_author = all_books[all_books['authors'].str.contains(author, case=False, na=False)]
+    # authors_lowercase is an arrow-backed string column, so this plain text (regex=False) search
+    # runs in arrow's own string code instead of looping over python strings
+    narrowed_author = all_books[all_books['authors_lowercase'].str.contains(author.lower(), regex=False, na=False)]
+
+    # narrows data based on "pages" or the book length the user is willing to read
+    # every book was already sorted into its page range in load_books, so this is a single comparison
+    # (the genre branch below gets this from top_books_in_genre instead)
+    narrowed_author = narrowed_author[narrowed_author['page_bucket'] == pages]
 
     # feeds this narrowed dataframe, and the user-selected author into the narrowed_general function from section 6
     narrowed_general(narrowed_author, author)
@@ -267,10 +357,10 @@ elif author_or_genre == 'Genre':
     pages = st.sidebar.selectbox('Page number', ('<300', '300-499', '500+'))
 
     # accepts user input for how many books the reader wants suggested
-    number_rec = st.sidebar.number_input('Number of book recommendations', min_value = 0, max_value = 1000)
+    number_rec = st.sidebar.number_input('Number of book recommendations', min_value = 0, max_value = max_recommendations)
 
-    # narrowing the dataframe based on what genre the user wants
-    narrowed_genre = all_books[all_books['categories'] == genre]
+    # narrowing the dataframe based on what genre and page range the user wants
+    narrowed_genre = top_books_in_genre(genre, pages)
 
     # feeds this narrowed dataframe, and the user-selected genre into the narrowed_general function from section 6
     narrowed_general(narrowed_genre, genre)